@@ -1,12 +1,68 @@
 import streamlit as st
 from visualization import visualize_huffman_tree
-from huffman_encoder import build_huffman_tree, get_huffman_codes, huffman_encode
+from huffman_encoder import (
+    bits_to_str,
+    build_huffman_tree,
+    code_to_str,
+    code_table_bits,
+    count_frequencies,
+    get_huffman_codes,
+    get_tree_signature,
+    huffman_encode,
+)
 from huffman_decoder import huffman_decode
 
-import io
 import pandas as pd
-from contextlib import redirect_stdout
-from collections import Counter
+
+# Longer encodings are truncated in the "Encoded Text" panel.
+MAX_DISPLAY_BITS = 4096
+
+
+def _huffman_pipeline(text, log=None):
+    """
+    Runs the full encode/decode pipeline for text. Only what the page shows
+    is returned: the first MAX_DISPLAY_BITS bits of the encoding and whether
+    decoding gave the text back, not the full buffers.
+    """
+    frequency = count_frequencies(text)
+    root = build_huffman_tree(frequency, log=log)
+    codes = get_huffman_codes(root, log=log)
+    encoded_data, encoded_bits = huffman_encode(text, codes, log=log)
+    decoded = huffman_decode((encoded_data, encoded_bits), codes, log=log)
+    shown_data = encoded_data[: MAX_DISPLAY_BITS // 8 + 1]
+    return frequency, root, codes, shown_data, encoded_bits, text == decoded
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _run_huffman(text):
+    """
+    Runs the pipeline, cached by the text's content so reruns triggered by
+    unrelated widgets reuse the previous result. The result holds no
+    text-sized buffers, which cache_data would unpickle on every rerun.
+    """
+    return _huffman_pipeline(text)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _decode_upload(file_id, size, _uploaded_file):
+    """
+    Decodes an uploaded file once per upload. The leading underscore keeps
+    Streamlit from hashing the file contents; file_id and size are the key.
+    cache_resource hands back the cached string itself, where cache_data
+    would unpickle (and so decode) a fresh copy on every rerun.
+    """
+    return _uploaded_file.getvalue().decode("utf-8")
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _visualize(signature, _root, _input_text):
+    """
+    Renders the tree once per signature; the root and text are not hashed.
+    """
+    # SVG lets trees of up to 128 leaves be drawn without Graphviz
+    return visualize_huffman_tree(
+        _root, view=False, input_text=_input_text, format="svg"
+    )
 
 
 st.set_page_config(page_title="Huffman Coding", page_icon="📦")
@@ -18,6 +74,7 @@ with st.sidebar:
     st.header("Controls")
     input_method = st.radio("Input Method:", ("Text Input", "File Upload"))
     verbose = st.radio("Verbose Mode:", ("Off", "On"), horizontal=True)
+    visualize = st.toggle("Visualize Tree", value=True)
 
 verification_placeholder = st.empty()
 
@@ -30,31 +87,27 @@ if input_method == "Text Input":
 else:
     uploaded_file = st.file_uploader("Upload a Text File:", type=["txt"])
     if uploaded_file:
-        text = uploaded_file.getvalue().decode("utf-8")
+        text = _decode_upload(uploaded_file.file_id, uploaded_file.size, uploaded_file)
 
 if st.button("Run Huffman Coding", use_container_width=True) or text:
     if not text:
         st.error("Input is empty!")
     else:
-        frequency = Counter(text)
-
         # Processing
         verbose_logs = ""
         if verbose == "On":
-            f = io.StringIO()
-            with redirect_stdout(f):
-                root = build_huffman_tree(text, frequency, verbose=True)
-                codes = get_huffman_codes(root, verbose=True)
-                encoded = huffman_encode(text, codes, verbose=True)
-                decoded = huffman_decode(encoded, root, verbose=True)
-            verbose_logs = f.getvalue()
+            # Not cached: the logs are only produced by a real run
+            buf = []
+            frequency, root, codes, shown_data, encoded_bits, verified = (
+                _huffman_pipeline(text, log=buf.append)
+            )
+            verbose_logs = "\n".join(buf)
         else:
-            root = build_huffman_tree(text, frequency, verbose=False)
-            codes = get_huffman_codes(root, verbose=False)
-            encoded = huffman_encode(text, codes, verbose=False)
-            decoded = huffman_decode(encoded, root, verbose=False)
+            frequency, root, codes, shown_data, encoded_bits, verified = _run_huffman(
+                text
+            )
 
-        if text == decoded:
+        if verified:
             verification_placeholder.success(
                 "✓ SUCCESS: Encoding and Decoding successful! Original text matches decoded text."
             )
@@ -69,32 +122,39 @@ if st.button("Run Huffman Coding", use_container_width=True) or text:
         with col1:  # Left panel for Text outputs
             with st.container():
                 st.subheader("Encoded Text")
-                st.code(encoded)
+                # Only the shown prefix is rendered as a bitstring
+                shown_bits = min(encoded_bits, MAX_DISPLAY_BITS)
+                st.code(
+                    bits_to_str(shown_data, shown_bits)
+                    + (" …" if encoded_bits > shown_bits else "")
+                )
 
             with st.container():
                 st.subheader("Decoded Text")
                 st.write(f"```\n{text[:200]}{'...' if len(text) > 200 else ''}\n```")
 
         with col2:  # Right panel Visual outputs
-            try:
-                with st.container():
-                    st.subheader("Huffman Tree Visualization")
-                    # Get both path and reuse status (explicitly set format)
-                    img_path = visualize_huffman_tree(
-                        root, view=False, input_text=text, format="png"
-                    )
-
-                    if img_path:
-                        st.image(img_path, use_container_width=True)
-                    else:
-                        st.warning("Tree visualization could not be generated")
-            except Exception as e:
-                st.error(f"Visualization Error: {str(e)}")
+            if visualize:
+                try:
+                    with st.container():
+                        st.subheader("Huffman Tree Visualization")
+                        # Cached per tree, so reruns skip the Graphviz render
+                        img_path = _visualize(get_tree_signature(root), root, text)
+
+                        if img_path:
+                            st.image(img_path, use_container_width=True)
+                        else:
+                            st.warning("Tree visualization could not be generated")
+                except Exception as e:
+                    st.error(f"Visualization Error: {str(e)}")
 
         with st.container():
             st.subheader("Huffman Codes")
             codes_df = pd.DataFrame(
-                [(repr(str(k)), frequency[k], v) for k, v in codes.items()],
+                [
+                    (repr(str(k)), frequency[k], code_to_str(v))
+                    for k, v in codes.items()
+                ],
                 columns=["Character", "Frequency", "Code"],
             )
             st.dataframe(codes_df, hide_index=True)
@@ -103,14 +163,11 @@ if st.button("Run Huffman Coding", use_container_width=True) or text:
         with st.container():
             st.subheader("Compression Statistics")
 
-            # Calculate huffman table size (overhead)
-            huffman_table_bits = 0
-            for char, code in codes.items():
-                # For each character: store character (8 bits) + code itself
-                huffman_table_bits += 8 + len(code)
+            # Calculate huffman table size (overhead): canonical codes only need
+            # each character (8 bits) and its code length
+            huffman_table_bits = code_table_bits(codes)
 
             original_bits = len(text) * 8
-            encoded_bits = len(encoded)
             total_compressed_bits = encoded_bits + huffman_table_bits
             saved = original_bits - total_compressed_bits
             ratio = (
@@ -1,71 +1,249 @@
-from rich import print
+from collections import Counter
+from itertools import chain
 
+from huffman_jit import JIT_AVAILABLE, jit_loaded
+from huffman_log import resolve_log
 
-def huffman_decode(encoded_text, huffman_tree_root, verbose=False):
+# Below this many bits the JIT call overhead outweighs the table decoder.
+_JIT_MIN_BITS = 1 << 16
+# Until Numba is imported, as in a one-shot CLI run, only inputs this long
+# make up for its import time (about 0.3 s).
+_JIT_COLD_MIN_BITS = 1 << 25
+# Filling a table entry walks its 8 bits through _walk_byte, which costs
+# about as much as walking 16 bits inline. The table is only set up when the
+# input has at least as many bits as filling all n_internal * 256 entries
+# would cost; shorter inputs are walked bit by bit.
+_TABLE_FILL_BITS = 16
+# The bits of every byte value, most significant first
+_BYTE_BITS = [
+    tuple((byte >> shift) & 1 for shift in range(7, -1, -1)) for byte in range(256)
+]
+
+
+def flatten_codes(huffman_codes):
+    """
+    Builds the decoding tree spelled by the Huffman codes as parallel lists
+    indexed by node id.
+
+    Canonical codes put every level's leaves to the left of its internal
+    nodes, so the tree is numbered a level at a time without walking the
+    codes bit by bit: internal nodes breadth-first from the root as 0, then
+    the leaves, so the first len(huffman_codes) - 1 ids are exactly the
+    internal nodes. Missing children are -1, and symbol holds the
+    character's code point for leaves and -1 for internal nodes.
+
+    Args:
+        huffman_codes (dict): The canonical codes for at least two
+            characters, as returned by get_huffman_codes.
+
+    Returns:
+        tuple: (left, right, symbol) lists of ints.
+    """
+    n_internal = len(huffman_codes) - 1
+    bl_count = Counter(length for _, length in huffman_codes.values())
+    max_length = max(bl_count)
+
+    left = [-1] * (2 * n_internal + 1)
+    right = [-1] * (2 * n_internal + 1)
+    # The first code value and leaf index of each level
+    first_code = [0] * (max_length + 1)
+    first_leaf = [0] * (max_length + 1)
+    # Each level's internal nodes have consecutive ids
+    first_parent, n_parents = 0, 1
+    next_leaf = n_internal
+    next_internal = 1
+    code = 0
+    for length in range(1, max_length + 1):
+        n_leaves = bl_count[length]
+        n_level_internal = 2 * n_parents - n_leaves
+        level = [
+            *range(next_leaf, next_leaf + n_leaves),
+            *range(next_internal, next_internal + n_level_internal),
+        ]
+        left[first_parent : first_parent + n_parents] = level[0::2]
+        right[first_parent : first_parent + n_parents] = level[1::2]
+        first_code[length] = code
+        first_leaf[length] = next_leaf - n_internal
+        first_parent, n_parents = next_internal, n_level_internal
+        next_leaf += n_leaves
+        next_internal += n_level_internal
+        code = (code + n_leaves) << 1
+
+    leaf_symbols = [0] * len(huffman_codes)
+    for char, (value, length) in huffman_codes.items():
+        leaf_symbols[first_leaf[length] + value - first_code[length]] = ord(char)
+    return left, right, [-1] * n_internal + leaf_symbols
+
+
+def _pack_bit_string(encoded_text):
+    """
+    Packs a validated '0'/'1' string into bytes, MSB-first and zero-padded.
+    (Internal helper function)
+    """
+    n_bits = len(encoded_text)
+    padding = -n_bits % 8
+    data = int(encoded_text + "0" * padding, 2).to_bytes((n_bits + padding) // 8, "big")
+    return data, n_bits
+
+
+def _walk_byte(children, symbol, node, byte, as_bytes):
     """
-    Decodes the Huffman encoded text using the Huffman tree.
+    Walks the 8 bits of byte through the flattened tree, starting at node.
+    Returns the resting node id and the symbols emitted on the way, as
+    Latin-1 bytes if as_bytes is set and otherwise as a tuple holding the
+    emitted str (empty if nothing was emitted), so that both forms can be
+    added onto the output buffer with +=.
+    (Internal helper function)
+    """
+    emitted = []
+    for shift in range(7, -1, -1):
+        node = children[2 * node + ((byte >> shift) & 1)]
+        if node < 0:
+            raise ValueError("Invalid path in Huffman tree during decoding.")
+        if symbol[node] >= 0:
+            emitted.append(symbol[node])
+            node = 0
+    if as_bytes:
+        return node, bytes(emitted)
+    return node, ("".join(map(chr, emitted)),) if emitted else ()
+
+
+def huffman_decode(encoded_text, huffman_codes, verbose=False, log=None):
+    """
+    Decodes the Huffman encoded text using the Huffman codes.
+
+    Canonical codes generally differ from the paths of the tree they were
+    derived from, so the tree they spell is rebuilt with flatten_codes as
+    left/right/symbol arrays. Whole bytes of the bitstream are then decoded
+    through a table that maps (node, byte) to the characters emitted while
+    walking those 8 bits and the node the walk rests on; entries are filled
+    the first time they are needed. Long inputs are walked by a
+    Numba-compiled kernel instead when Numba is installed.
 
     Args:
-        encoded_text (str): The Huffman encoded string.
-        huffman_tree_root (Node): The root of the Huffman tree.
+        encoded_text (str or tuple): The Huffman encoded string, or the
+            (bytes, n_bits) packed bitstream returned by huffman_encode.
+        huffman_codes (dict): The codes the text was encoded with, as
+            returned by get_huffman_codes.
         verbose (bool): If True, prints detailed steps.
+        log (callable, optional): Called with each detailed step instead of
+            printing it, e.g. a list's append method.
 
     Returns:
         str: The original decoded string.
     """
-    if not encoded_text or huffman_tree_root is None:
-        if verbose:
-            print("VERBOSE: Encoded text is empty or tree root is None. Cannot decode.")
+    log = resolve_log(log, verbose)
+    if isinstance(encoded_text, tuple):
+        data, n_bits = encoded_text
+    else:
+        data, n_bits = None, len(encoded_text)
+
+    if not n_bits or not huffman_codes:
+        if log:
+            log("VERBOSE: Encoded text or Huffman codes are empty. Cannot decode.")
         return ""
 
-    if verbose:
-        print("\nVERBOSE: ---- Decoding Text ----")
-
-    decoded_chars = []
-    current_node = huffman_tree_root
-
-    if (
-        current_node.char is not None
-        and current_node.left is None
-        and current_node.right is None
-    ):
-        if all(bit == "0" for bit in encoded_text):
-            decoded_string = current_node.char * len(encoded_text)
-            if verbose:
-                print(
+    if log:
+        log("\nVERBOSE: ---- Decoding Text ----")
+
+    if len(huffman_codes) == 1:
+        # A single-node tree's only code is '0'; str.count / bytes.count
+        # scan for it in C
+        if (
+            data.count(0, 0, (n_bits + 7) // 8) == (n_bits + 7) // 8
+            if data is not None
+            else encoded_text.count("0") == n_bits
+        ):
+            (char,) = huffman_codes
+            decoded_string = char * n_bits
+            if log:
+                log(
                     f"VERBOSE: Single-node tree decoding. Decoded to: {decoded_string[:100]}{'...' if len(decoded_string) > 100 else ''}"
                 )
             return decoded_string
         else:
             raise ValueError("Invalid code for single-node tree during decoding.")
 
-    for i, bit in enumerate(encoded_text):
-        if bit == "0":
-            current_node = current_node.left
-            if verbose and i < 20:
-                print(
-                    f"VERBOSE: Bit '{bit}' -> Traversing Left. Current node: {current_node}"
-                )
-        elif bit == "1":
-            current_node = current_node.right
-            if verbose and i < 20:
-                print(
-                    f"VERBOSE: Bit '{bit}' -> Traversing Right. Current node: {current_node}"
-                )
-        else:
-            raise ValueError(f"Invalid bit '{bit}' in encoded string.")
+    if data is None:
+        invalid = encoded_text.translate({ord("0"): None, ord("1"): None})
+        if invalid:
+            raise ValueError(f"Invalid bit '{invalid[0]}' in encoded string.")
 
-        if current_node is None:
-            raise ValueError("Invalid path in Huffman tree during decoding.")
+    tree = flatten_codes(huffman_codes)
+    jit_min_bits = _JIT_MIN_BITS if jit_loaded() else _JIT_COLD_MIN_BITS
+    if JIT_AVAILABLE and not log and n_bits >= jit_min_bits:
+        # Imported here so that other decodes load neither NumPy nor Numba
+        from huffman_decoder_core import decode_bit_string, decode_packed
+
+        if data is None:
+            return decode_bit_string(encoded_text, tree)
+        return decode_packed(data, n_bits, tree)
 
-        if current_node.char is not None:
-            decoded_chars.append(current_node.char)
-            if verbose and i < 20:
-                print(
-                    f"VERBOSE: Found character '{current_node.char}'. Resetting to root."
+    if data is None:
+        data, n_bits = _pack_bit_string(encoded_text)
+    left, right, symbol = tree
+    # children[2 * node + bit] selects the child without branching on the bit
+    children = [-1] * (2 * len(left))
+    children[0::2] = left
+    children[1::2] = right
+    # Byte alphabets are written straight into a bytearray; others are
+    # collected as str pieces and joined at the end.
+    as_bytes = max(symbol) < 256
+    out = bytearray() if as_bytes else []
+    n_internal = len(huffman_codes) - 1
+
+    node = 0
+    full_bytes = memoryview(data)[: n_bits // 8]
+    if log:
+        # The logged bytes are walked here, keeping the main loop check-free
+        for byte in full_bytes[:3]:
+            next_node, emitted = _walk_byte(children, symbol, node, byte, as_bytes)
+            shown = emitted.decode("latin-1") if as_bytes else "".join(emitted)
+            # Node ids belong to the decoding tree, not the drawn one, so
+            # only whether a code runs on into the next byte is reported
+            log(
+                f"VERBOSE: Byte '{byte:08b}' -> Emitted '{shown}'{', code continues into the next byte' if next_node else ''}"
+            )
+            node = next_node
+            out += emitted
+        full_bytes = full_bytes[3:]
+
+    # The trailing partial byte is zero-padded, so its bits are walked
+    # singly, as are all the bits when the table would cost more to fill
+    # than it saves.
+    start = n_bits - n_bits % 8
+    if len(full_bytes) * 8 >= n_internal * 256 * _TABLE_FILL_BITS:
+        # Internal nodes are numbered first, so node * 256 + byte ->
+        # (resting node * 256, emitted characters), filled on first use
+        table = [None] * (n_internal * 256)
+        # The loop tracks node * 256, the start of the node's row in the
+        # table, so each byte costs a single addition to find its entry.
+        row = node << 8
+        for byte in full_bytes:
+            entry = table[row + byte]
+            if entry is None:
+                next_node, emitted = _walk_byte(
+                    children, symbol, row >> 8, byte, as_bytes
                 )
-            current_node = huffman_tree_root
+                entry = table[row + byte] = (next_node << 8, emitted)
+            row, emitted = entry
+            out += emitted
+        node = row >> 8
+    else:
+        start -= len(full_bytes) * 8
+
+    # start is byte-aligned; looking up each byte's bits keeps the shifts
+    # out of the loop
+    bits = list(chain.from_iterable(map(_BYTE_BITS.__getitem__, data[start >> 3 :])))
+    for bit in bits[: n_bits - start]:
+        node = children[2 * node + bit]
+        if node < 0:
+            raise ValueError("Invalid path in Huffman tree during decoding.")
+        # Leaves are numbered after the internal nodes
+        if node >= n_internal:
+            out.append(symbol[node] if as_bytes else chr(symbol[node]))
+            node = 0
 
-    final_decoded_string = "".join(decoded_chars)
-    print("VERBOSE: ----------------------") if verbose else None
+    final_decoded_string = out.decode("latin-1") if as_bytes else "".join(out)
+    log("VERBOSE: ----------------------") if log else None
     return final_decoded_string
@@ -0,0 +1,155 @@
+import numpy as np
+
+# Without Numba the walks below run as plain Python, slower than the table
+# decoder in huffman_decoder, so callers should only use them when
+# JIT_AVAILABLE is set. This module is only imported for those calls, so
+# short decodes never load NumPy.
+from huffman_jit import JIT_AVAILABLE, lazy_njit
+
+
+# The byte table takes about 9.5 KB per internal node; trees with more
+# internal nodes (alphabets over 512 characters) are walked bit by bit.
+TABLE_MAX_NODES = 511
+
+
+def _build_byte_table(children, symbol, n_internal):
+    """
+    Walks the 8 bits of every byte value from every internal node of the
+    flattened tree (ids 0 to n_internal - 1), recording the node the walk
+    rests on (-1 for an invalid path), how many symbols it emitted and their
+    code points.
+    (Internal helper function)
+    """
+    next_node = np.full((n_internal, 256), -1, dtype=np.int32)
+    n_emitted = np.zeros((n_internal, 256), dtype=np.uint8)
+    emitted = np.zeros((n_internal, 256, 8), dtype=np.int32)
+    for start in range(n_internal):
+        for byte in range(256):
+            node = start
+            k = 0
+            for shift in range(7, -1, -1):
+                node = children[node, (byte >> shift) & 1]
+                if node < 0:
+                    break
+                if symbol[node] >= 0:
+                    emitted[start, byte, k] = symbol[node]
+                    k += 1
+                    node = 0
+            next_node[start, byte] = node
+            n_emitted[start, byte] = k
+    return next_node, n_emitted, emitted
+
+
+def _decode_bytes(data, n_bytes, next_node, n_emitted, emitted, out):
+    """
+    Decodes the first n_bytes whole bytes of data through the byte table,
+    one lookup per byte, writing code points into out.
+
+    Returns the number of symbols written and the resting node, or (-1, -1)
+    on an invalid path.
+    (Internal helper function)
+    """
+    n = 0
+    node = 0
+    for i in range(n_bytes):
+        byte = data[i]
+        for j in range(n_emitted[node, byte]):
+            out[n + j] = emitted[node, byte, j]
+        n += n_emitted[node, byte]
+        node = next_node[node, byte]
+        if node < 0:
+            return -1, -1
+    return n, node
+
+
+def _decode_bits(data, start, n_bits, node, n, children, symbol, out):
+    """
+    Walks bits start..n_bits of the packed uint8 array data from node, most
+    significant bit first, indexing the (node, 2) children array by each
+    bit. Code points are written into out after the n already there.
+
+    Returns the total number of symbols written, or -1 on an invalid path.
+    (Internal helper function)
+    """
+    for i in range(start, n_bits):
+        node = children[node, (data[i >> 3] >> (7 - (i & 7))) & 1]
+        if node < 0:
+            return -1
+        if symbol[node] >= 0:
+            out[n] = symbol[node]
+            n += 1
+            node = 0
+    return n
+
+
+if JIT_AVAILABLE:
+    _build_byte_table = lazy_njit(_build_byte_table)
+    _decode_bytes = lazy_njit(_decode_bytes)
+    _decode_bits = lazy_njit(_decode_bits)
+
+
+def _decode_packed_array(data, n_bits, tree):
+    """
+    Runs the compiled decoders over a packed uint8 array: whole bytes through
+    the byte table when the tree is small enough, then the remaining bits
+    one at a time.
+    (Internal helper function)
+    """
+    left, right, symbol = (np.array(array, dtype=np.int32) for array in tree)
+    children = np.column_stack((left, right))
+    # Internal nodes come first and a full tree has one more leaf than them
+    n_internal = len(symbol) // 2
+    # The shortest canonical code is all zeros, the leftmost path, and every
+    # symbol takes at least that many bits
+    min_length, node = 0, 0
+    while node < n_internal:
+        node = tree[0][node]
+        min_length += 1
+    # Latin-1 output fits one byte per symbol and decodes without a copy
+    latin1 = symbol.max() < 256
+    out = np.empty(n_bits // min_length, dtype=np.uint8 if latin1 else np.int32)
+    n, node, start = 0, 0, 0
+    if n_internal <= TABLE_MAX_NODES:
+        table = _build_byte_table(children, symbol, n_internal)
+        n, node = _decode_bytes(data, n_bits // 8, *table, out)
+        start = n_bits - n_bits % 8
+    if node >= 0:
+        n = _decode_bits(data, start, n_bits, node, n, children, symbol, out)
+    if n < 0:
+        raise ValueError("Invalid path in Huffman tree during decoding.")
+    if latin1:
+        return out[:n].tobytes().decode("latin-1")
+    return out[:n].astype("<u4").tobytes().decode("utf-32-le", "surrogatepass")
+
+
+def decode_bit_string(encoded_text, tree):
+    """
+    Decodes a '0'/'1' string with the JIT-compiled tree walk.
+
+    Args:
+        encoded_text (str): The Huffman encoded string, containing only '0'/'1'.
+        tree (tuple): The (left, right, symbol) lists of the decoding tree,
+            as returned by flatten_codes, with at least two leaves.
+
+    Returns:
+        str: The original decoded string.
+    """
+    bits = np.frombuffer(encoded_text.encode("ascii"), dtype=np.uint8) - ord("0")
+    return _decode_packed_array(np.packbits(bits), len(bits), tree)
+
+
+def decode_packed(data, n_bits, tree):
+    """
+    Decodes a packed bitstream with the JIT-compiled tree walk.
+
+    Args:
+        data (bytes): The packed bitstream, as returned by huffman_encode.
+        n_bits (int): The number of meaningful bits in data.
+        tree (tuple): The (left, right, symbol) lists of the decoding tree,
+            as returned by flatten_codes, with at least two leaves.
+
+    Returns:
+        str: The original decoded string.
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    return _decode_packed_array(data, n_bits, tree)
@@ -1,5 +1,21 @@
-import heapq
-from rich import print
+from collections import Counter, deque
+from itertools import islice
+
+from huffman_jit import JIT_AVAILABLE, jit_loaded
+from huffman_log import resolve_log
+
+# Below this length the NumPy table setup costs more than the Python loop.
+# NumPy is only imported for texts this long, so short runs skip its import.
+_NUMPY_MIN_LENGTH = 4096
+# Below this length loading the compiled encoder costs more than it saves.
+_JIT_MIN_LENGTH = 1 << 16
+# Until Numba is imported, as in a one-shot CLI run, only texts this long
+# make up for its import time (about 0.3 s) over the Python loop.
+_JIT_COLD_MIN_LENGTH = 1 << 21
+_NUMPY_CHUNK = 1 << 20
+_PYTHON_CHUNK = 1 << 16
+# Verbose mode lists at most this many nodes of each queue per step.
+_VERBOSE_QUEUE_PREVIEW = 8
 
 
 class Node:
@@ -9,194 +25,469 @@ class Node:
     and references to its left and right children.
     """
 
-    def __init__(self, char, freq):
+    __slots__ = ("char", "freq", "left", "right")
+
+    def __init__(self, char, freq, left=None, right=None):
         self.char = char
         self.freq = freq
-        self.left = None
-        self.right = None
-
-    def __lt__(self, other):
-        if other is None:
-            return False
-        if not isinstance(other, Node):
-            return NotImplemented
-        return self.freq < other.freq
-
-    def __eq__(self, other):
-        if other is None:
-            return False
-        if not isinstance(other, Node):
-            return False
-        return self.freq == other.freq
+        self.left = left
+        self.right = right
 
     def __repr__(self):
         return f"Node(char='{self.char}', freq={self.freq})"
 
 
-def build_huffman_tree(text, frequency, verbose=False):
+def _pop_min(leaves, internal_nodes):
+    """
+    Pops the lower-frequency head of the two queues, preferring leaves on ties.
+    (Internal helper function)
     """
-    Builds the Huffman tree for the given text.
+    if not internal_nodes or (leaves and leaves[0].freq <= internal_nodes[0].freq):
+        return leaves.popleft()
+    return internal_nodes.popleft()
 
-    Args:
-        text (str): The input string to be encoded.
-        frequency (Counter): A Counter object with character frequencies.
-        verbose (bool): If True, prints detailed steps.
 
-    Returns:
-        Node: The root node of the Huffman tree, or None if text is empty.
+def count_frequencies(text):
     """
-    if not text:
-        if verbose:
-            print("VERBOSE: Input text is empty. Cannot build Huffman tree.")
-        return None
+    Counts how often each character occurs in the text.
 
-    if verbose:
-        print("\nVERBOSE: ---- Character Frequencies ----")
-        for char, freq in sorted(frequency.items()):
-            print(f"VERBOSE: Character '{char}': {freq}")
+    Long Latin-1 texts are counted with np.bincount over their byte view,
+    and other long texts with np.unique over their UTF-32 code points;
+    short texts use Counter directly.
 
-    priority_queue = [Node(char, freq) for char, freq in frequency.items()]
-    heapq.heapify(priority_queue)
+    Args:
+        text (str): The input string.
 
-    if verbose:
-        print("\nVERBOSE: ---- Initial Priority Queue (Min-Heap) ----")
-        for node in heapq.nsmallest(len(priority_queue), priority_queue):
-            print(f"VERBOSE: {node}")
-        print("VERBOSE: ------------------------------------------")
+    Returns:
+        Counter: A Counter object with character frequencies.
+    """
+    if len(text) < _NUMPY_MIN_LENGTH:
+        return Counter(text)
+    import numpy as np
+
+    try:
+        counts = np.bincount(np.frombuffer(text.encode("latin-1"), dtype=np.uint8))
+    except UnicodeEncodeError:
+        code_points = np.frombuffer(
+            text.encode("utf-32-le", "surrogatepass"), dtype="<u4"
+        )
+        present, counts = np.unique(code_points, return_counts=True)
+    else:
+        present = np.flatnonzero(counts)
+        counts = counts[present]
+    return Counter(dict(zip(map(chr, present.tolist()), counts.tolist())))
 
-    while len(priority_queue) > 1:
-        left_child = heapq.heappop(priority_queue)
-        right_child = heapq.heappop(priority_queue)
 
-        if verbose:
-            print("\nVERBOSE: ---- Tree Building Step ----")
-            print(f"VERBOSE: Popped Left Child: {left_child}")
-            print(f"VERBOSE: Popped Right Child: {right_child}")
+def _log_queue(lines, queue, prefix):
+    """
+    Appends the first _VERBOSE_QUEUE_PREVIEW nodes of a queue to the verbose lines.
+    (Internal helper function)
+    """
+    for node in islice(queue, _VERBOSE_QUEUE_PREVIEW):
+        lines.append(f"{prefix}{node}")
+    if len(queue) > _VERBOSE_QUEUE_PREVIEW:
+        lines.append(f"{prefix}... ({len(queue) - _VERBOSE_QUEUE_PREVIEW} more)")
 
-        merged_freq = left_child.freq + right_child.freq
-        internal_node = Node(None, merged_freq)
-        internal_node.left = left_child
-        internal_node.right = right_child
 
-        if verbose:
-            print(
-                f"VERBOSE: Created Internal Node: {internal_node} (Left: '{left_child.char}', Right: '{right_child.char}')"
-            )
+def build_huffman_tree(frequency, verbose=False, log=None):
+    """
+    Builds the Huffman tree from the character frequencies of a text.
 
-        heapq.heappush(priority_queue, internal_node)
+    Uses the two-queue construction: leaves are sorted by frequency once,
+    and merged nodes are appended to a second FIFO queue. Merged frequencies
+    never decrease, so both queues stay sorted and the two smallest nodes
+    are always at their heads, making the build linear after the sort.
 
-        if verbose:
-            print(f"VERBOSE: Priority Queue after pushing {internal_node}:")
-            for node in heapq.nsmallest(len(priority_queue), priority_queue):
-                print(f"VERBOSE:   {node}")
-            print("VERBOSE: -----------------------------")
+    Args:
+        frequency (Counter): A Counter object with character frequencies, as
+            returned by count_frequencies.
+        verbose (bool): If True, prints detailed steps.
+        log (callable, optional): Called with each detailed step instead of
+            printing it, e.g. a list's append method.
 
-    if verbose and priority_queue:
-        print("\nVERBOSE: ---- Huffman Tree Built ----")
-        print(f"VERBOSE: Root of the tree: {priority_queue[0]}")
-        print("VERBOSE: ---------------------------")
-    return priority_queue[0] if priority_queue else None
+    Returns:
+        Node: The root node of the Huffman tree, or None if frequency is empty.
+    """
+    log = resolve_log(log, verbose)
+    if not frequency:
+        if log:
+            log("VERBOSE: Input text is empty. Cannot build Huffman tree.")
+        return None
 
+    # Verbose lines are collected and logged once at the end.
+    lines = []
+    if log:
+        lines.append("\nVERBOSE: ---- Character Frequencies ----")
+        for char, freq in sorted(frequency.items()):
+            lines.append(f"VERBOSE: Character '{char}': {freq}")
+
+    # Ties are broken by character, so the tree depends only on the counts
+    # and not on the order the characters were first seen in
+    by_count = sorted(frequency.items(), key=lambda item: (item[1], item[0]))
+    leaves = deque(Node(char, freq) for char, freq in by_count)
+    internal_nodes = deque()
+
+    if log:
+        lines.append("\nVERBOSE: ---- Initial Leaf Queue (Sorted by Frequency) ----")
+        _log_queue(lines, leaves, "VERBOSE: ")
+        lines.append("VERBOSE: ------------------------------------------")
+
+    while len(leaves) + len(internal_nodes) > 1:
+        left_child = _pop_min(leaves, internal_nodes)
+        right_child = _pop_min(leaves, internal_nodes)
+
+        if log:
+            lines.append("\nVERBOSE: ---- Tree Building Step ----")
+            lines.append(f"VERBOSE: Popped Left Child: {left_child}")
+            lines.append(f"VERBOSE: Popped Right Child: {right_child}")
+
+        internal_node = Node(
+            None, left_child.freq + right_child.freq, left_child, right_child
+        )
+        internal_nodes.append(internal_node)
 
-def _generate_huffman_codes_recursive(
-    root_node, current_code, codes_dict, verbose=False
-):
+        if log:
+            lines.append(
+                f"VERBOSE: Created Internal Node: {internal_node} (Left: '{left_child.char}', Right: '{right_child.char}')"
+            )
+            lines.append("VERBOSE: Leaf Queue:")
+            _log_queue(lines, leaves, "VERBOSE:   ")
+            lines.append("VERBOSE: Internal Node Queue:")
+            _log_queue(lines, internal_nodes, "VERBOSE:   ")
+            lines.append("VERBOSE: -----------------------------")
+
+    root = internal_nodes[0] if internal_nodes else leaves[0] if leaves else None
+    if log:
+        lines.append("\nVERBOSE: ---- Huffman Tree Built ----")
+        lines.append(f"VERBOSE: Root of the tree: {root}")
+        lines.append("VERBOSE: ---------------------------")
+        log("\n".join(lines))
+    return root
+
+
+def _leaf_depths(root_node):
     """
-    Recursively traverses the Huffman tree to generate codes for each character.
+    Yields every leaf of the tree with its depth, walking it with an
+    explicit stack. The leaf of a single-node tree gets depth 1, the length
+    of its code.
     (Internal helper function)
     """
     if root_node is None:
         return
-
     if root_node.char is not None:
-        final_code = current_code if current_code else "0"
-        codes_dict[root_node.char] = final_code
-        if verbose:
-            print(
-                f"VERBOSE: Generated Code - Character: '{root_node.char}', Path: {final_code if final_code else '(root is leaf)'}"
-            )
+        yield root_node, 1
         return
 
-    if verbose:
-        print(
-            f"VERBOSE: Traversing Left from Node(freq={root_node.freq}). Current code: {current_code} -> {current_code + '0'}"
-        )
-    _generate_huffman_codes_recursive(
-        root_node.left, current_code + "0", codes_dict, verbose
-    )
+    stack = [(root_node, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if node.char is not None:
+            yield node, depth
+        else:
+            stack.append((node.right, depth + 1))
+            stack.append((node.left, depth + 1))
 
-    if verbose:
-        print(
-            f"VERBOSE: Traversing Right from Node(freq={root_node.freq}). Current code: {current_code} -> {current_code + '1'}"
-        )
-    _generate_huffman_codes_recursive(
-        root_node.right, current_code + "1", codes_dict, verbose
+
+def get_code_lengths(root_node):
+    """
+    Finds the code length (leaf depth) of every character in the tree.
+
+    Args:
+        root_node (Node): The root node of the Huffman tree.
+
+    Returns:
+        dict: A dictionary mapping characters to their code lengths. The
+        character of a single-node tree gets length 1.
+    """
+    return {leaf.char: depth for leaf, depth in _leaf_depths(root_node)}
+
+
+def get_tree_signature(root_node):
+    """
+    Describes a tree by the (character, code length, frequency) triples of
+    its leaves. build_huffman_tree's result depends only on the frequencies,
+    so trees with equal signatures are identical.
+
+    Args:
+        root_node (Node): The root node of the Huffman tree.
+
+    Returns:
+        tuple: The (char, code_length, freq) triples in character order.
+    """
+    return tuple(
+        sorted((leaf.char, depth, leaf.freq) for leaf, depth in _leaf_depths(root_node))
     )
 
 
-def get_huffman_codes(root_node, verbose=False):
+def _canonical_codes(lengths):
+    """
+    Assigns canonical codes from code lengths, as in DEFLATE: count the codes
+    of each length, derive the first code of each length, then hand out
+    consecutive values to characters in sorted order.
+    (Internal helper function)
     """
-    Generates Huffman codes for all characters in the tree.
+    max_length = max(lengths.values())
+    bl_count = [0] * (max_length + 1)
+    for length in lengths.values():
+        bl_count[length] += 1
+
+    next_code = [0] * (max_length + 1)
+    code = 0
+    for bits in range(1, max_length + 1):
+        code = (code + bl_count[bits - 1]) << 1
+        next_code[bits] = code
+
+    codes = {}
+    for char in sorted(lengths):
+        length = lengths[char]
+        codes[char] = (next_code[length], length)
+        next_code[length] += 1
+    return codes
+
+
+def get_huffman_codes(root_node, verbose=False, log=None):
+    """
+    Generates canonical Huffman codes for all characters in the tree.
+
+    Only the code lengths are read from the tree; the codes themselves are
+    derived from the lengths (see _canonical_codes). Each code is as long as
+    the character's path from the root, but its bits need not spell that
+    path, so decoding works from the codes rather than the tree.
 
     Args:
         root_node (Node): The root node of the Huffman tree.
         verbose (bool): If True, prints detailed steps.
+        log (callable, optional): Called with each detailed step instead of
+            printing it, e.g. a list's append method.
 
     Returns:
-        dict: A dictionary mapping characters to their Huffman codes.
+        dict: A dictionary mapping characters, in sorted order, to their
+        Huffman codes, each a (value, bit_length) tuple with the first bit as
+        the most significant.
     """
+    log = resolve_log(log, verbose)
     if root_node is None:
-        if verbose:
-            print("VERBOSE: Root node is None. Cannot generate codes.")
+        if log:
+            log("VERBOSE: Root node is None. Cannot generate codes.")
         return {}
 
-    codes = {}
-    if verbose:
-        print("\nVERBOSE: ---- Generating Huffman Codes ----")
+    if log:
+        log("\nVERBOSE: ---- Generating Huffman Codes ----")
 
     if (
         root_node.char is not None
         and root_node.left is None
         and root_node.right is None
     ):
-        codes[root_node.char] = "0"
-        if verbose:
-            print(
-                f"VERBOSE: Single node tree. Character: '{root_node.char}', Code: '0'"
+        if log:
+            log(f"VERBOSE: Single node tree. Character: '{root_node.char}', Code: '0'")
+        return {root_node.char: (0, 1)}
+
+    codes = _canonical_codes(get_code_lengths(root_node))
+    if log:
+        for char, code in codes.items():
+            log(
+                f"VERBOSE: Generated Code - Character: '{char}', Length: {code[1]}, Code: {code_to_str(code)}"
             )
-        return codes
-
-    _generate_huffman_codes_recursive(root_node, "", codes, verbose)
-    print("VERBOSE: ---------------------------------") if verbose else None
+    log("VERBOSE: ---------------------------------") if log else None
     return codes
 
 
-def huffman_encode(text, huffman_codes, verbose=False):
+def code_to_str(code):
+    """
+    Renders a (value, bit_length) Huffman code as a string of '0'/'1' characters.
+
+    Args:
+        code (tuple): A code as returned in get_huffman_codes' dictionary.
+
+    Returns:
+        str: The code's bits, most significant bit first.
+    """
+    value, length = code
+    return format(value, f"0{length}b")
+
+
+def _pack_codes_python(text, huffman_codes):
+    """
+    Packs the codes for text by joining their '0'/'1' strings and converting
+    each joined chunk with int(..., 2), which parses and packs the bits in C.
+    Chunks of _PYTHON_CHUNK characters bound the size of the bit string;
+    the bits left over after a chunk's whole bytes are carried into the next.
+    (Internal helper function)
+    """
+    str_codes = {char: code_to_str(code) for char, code in huffman_codes.items()}
+    out = bytearray()
+    carry = ""
+    for start in range(0, len(text), _PYTHON_CHUNK):
+        try:
+            bits = carry + "".join(
+                map(str_codes.__getitem__, text[start : start + _PYTHON_CHUNK])
+            )
+        except KeyError as e:
+            raise ValueError(
+                f"Character '{e.args[0]}' not found in Huffman codes."
+            ) from None
+        whole = len(bits) - len(bits) % 8
+        if whole:
+            out += int(bits[:whole], 2).to_bytes(whole // 8, "big")
+        carry = bits[whole:]
+
+    n_bits = len(out) * 8 + len(carry)
+    if carry:
+        out += int(carry.ljust(8, "0"), 2).to_bytes(1, "big")
+    return bytes(out), n_bits
+
+
+def _pack_codes_numpy(text, huffman_codes):
+    """
+    Packs the codes for an ASCII text by gathering from per-byte code tables.
+    (Internal helper function)
+    """
+    import numpy as np
+
+    max_length = max(length for _, length in huffman_codes.values())
+    code_bits = np.zeros((256, max_length), dtype=np.uint8)
+    code_mask = np.zeros((256, max_length), dtype=bool)
+    for char, (value, length) in huffman_codes.items():
+        if ord(char) < 256:
+            code_bits[ord(char), :length] = [
+                (value >> shift) & 1 for shift in range(length - 1, -1, -1)
+            ]
+            code_mask[ord(char), :length] = True
+
+    buf = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    missing = ~code_mask[buf, 0]
+    if missing.any():
+        char = chr(buf[missing.argmax()])
+        raise ValueError(f"Character '{char}' not found in Huffman codes.")
+
+    # Selecting each symbol's masked row flattens to the concatenated
+    # bitstream; chunks bound the temporary to _NUMPY_CHUNK * max_length bytes.
+    out = bytearray()
+    carry = np.empty(0, dtype=np.uint8)
+    n_bits = 0
+    for start in range(0, len(buf), _NUMPY_CHUNK):
+        chunk = buf[start : start + _NUMPY_CHUNK]
+        bits = code_bits[chunk][code_mask[chunk]]
+        n_bits += len(bits)
+        if len(carry):
+            bits = np.concatenate((carry, bits))
+        whole = len(bits) - len(bits) % 8
+        out += np.packbits(bits[:whole]).tobytes()
+        carry = bits[whole:]
+    out += np.packbits(carry).tobytes()
+    return bytes(out), n_bits
+
+
+def _jit_symbols(text, huffman_codes):
+    """
+    Returns text as Latin-1 bytes if the compiled encoder should take it,
+    otherwise None. ASCII texts are left to the NumPy encoder, which needs
+    no compiler to be loaded.
+    (Internal helper function)
+    """
+    min_length = _JIT_MIN_LENGTH if jit_loaded() else _JIT_COLD_MIN_LENGTH
+    if not JIT_AVAILABLE or len(text) < min_length or text.isascii():
+        return None
+    from huffman_encoder_core import MAX_CODE_LENGTH
+
+    max_length = max((length for _, length in huffman_codes.values()), default=0)
+    if max_length > MAX_CODE_LENGTH:
+        return None
+    try:
+        return text.encode("latin-1")
+    except UnicodeEncodeError:
+        return None
+
+
+def huffman_encode(text, huffman_codes, verbose=False, log=None):
     """
     Encodes the input text using the generated Huffman codes.
 
+    The codes are packed MSB-first into a byte buffer, so each encoded bit
+    costs a bit of memory rather than a whole character. Long ASCII texts
+    are packed with NumPy table lookups instead of a Python loop, and long
+    non-ASCII Latin-1 texts by a Numba-compiled loop when Numba is
+    installed. A single-node tree's all-zero encoding is produced directly.
+
     Args:
         text (str): The original string.
         huffman_codes (dict): A dictionary mapping characters to their Huffman codes.
         verbose (bool): If True, prints detailed steps.
+        log (callable, optional): Called with each detailed step instead of
+            printing it, e.g. a list's append method.
 
     Returns:
-        str: The Huffman encoded string.
-    """
-    if verbose:
-        print("\nVERBOSE: ---- Encoding Text ----")
-    encoded_text = []
-    for i, char in enumerate(text):
-        code = huffman_codes.get(char)
-        if code is None:
-            raise ValueError(f"Character '{char}' not found in Huffman codes.")
-        encoded_text.append(code)
-        if verbose and i < 5:
-            current_encoded_preview = "".join(encoded_text)
-            print(
+        tuple: (bytes, int) - the packed bitstream (zero-padded to a whole
+        byte) and the number of meaningful bits in it.
+    """
+    log = resolve_log(log, verbose)
+    if log:
+        log("\nVERBOSE: ---- Encoding Text ----")
+        current_encoded_preview = ""
+        for char in text[:5]:
+            code = huffman_codes.get(char)
+            if code is None:
+                break
+            code = code_to_str(code)
+            current_encoded_preview += code
+            log(
                 f"VERBOSE: Encoding '{char}' to '{code}'. Current encoded: ...{current_encoded_preview[-20:]}"
             )
-    print("VERBOSE: ----------------------") if verbose else None
 
-    final_encoded_text = "".join(encoded_text)
-    return final_encoded_text
+    single_code = False
+    if len(huffman_codes) == 1:
+        char, (value, length) = next(iter(huffman_codes.items()))
+        single_code = value == 0 and text.count(char) == len(text)
+    symbols = None if single_code else _jit_symbols(text, huffman_codes)
+
+    if single_code:
+        # A single-node tree codes every character as zeros
+        n_bits = len(text) * length
+        encoded = bytes((n_bits + 7) // 8), n_bits
+    elif symbols is not None:
+        from huffman_encoder_core import encode_bytes
+
+        encoded = encode_bytes(symbols, huffman_codes)
+    elif len(text) >= _NUMPY_MIN_LENGTH and text.isascii():
+        encoded = _pack_codes_numpy(text, huffman_codes)
+    else:
+        encoded = _pack_codes_python(text, huffman_codes)
+    log("VERBOSE: ----------------------") if log else None
+
+    return encoded
+
+
+def code_table_bits(huffman_codes):
+    """
+    Computes the size of the code table that must be stored with the encoded
+    text. Canonical codes are fixed by their lengths, so each entry is the
+    character (8 bits) plus its code length in just enough bits to hold the
+    longest one.
+
+    Args:
+        huffman_codes (dict): A dictionary mapping characters to their Huffman codes.
+
+    Returns:
+        int: The table size in bits.
+    """
+    if not huffman_codes:
+        return 0
+    max_length = max(length for _, length in huffman_codes.values())
+    return len(huffman_codes) * (8 + max_length.bit_length())
+
+
+def bits_to_str(data, n_bits):
+    """
+    Renders a packed bitstream as a string of '0'/'1' characters.
+
+    Args:
+        data (bytes): The packed bitstream, as returned by huffman_encode.
+        n_bits (int): The number of meaningful bits in data.
+
+    Returns:
+        str: The first n_bits bits of data, most significant bit first.
+    """
+    if not n_bits:
+        return ""
+    return bin(int.from_bytes(data, "big"))[2:].zfill(len(data) * 8)[:n_bits]
@@ -0,0 +1,66 @@
+import numpy as np
+
+# Without Numba the loop below runs as plain Python, slower than the other
+# encoders in huffman_encoder, so callers should only use it when
+# JIT_AVAILABLE is set.
+from huffman_jit import JIT_AVAILABLE, lazy_njit
+
+# A code is shifted into a 64-bit buffer holding at most 7 leftover bits.
+MAX_CODE_LENGTH = 56
+
+
+def _encode(symbols, code_value, code_length, out):
+    """
+    Shifts the code of every byte in symbols into a 64-bit buffer and writes
+    each completed byte into out, then the zero-padded tail.
+    (Internal helper function)
+    """
+    buffer = np.uint64(0)
+    buffered_bits = 0
+    j = 0
+    for i in range(symbols.shape[0]):
+        length = code_length[symbols[i]]
+        buffer = (buffer << np.uint64(length)) | code_value[symbols[i]]
+        buffered_bits += length
+        while buffered_bits >= 8:
+            buffered_bits -= 8
+            out[j] = (buffer >> np.uint64(buffered_bits)) & np.uint64(0xFF)
+            j += 1
+    if buffered_bits:
+        out[j] = (buffer << np.uint64(8 - buffered_bits)) & np.uint64(0xFF)
+
+
+if JIT_AVAILABLE:
+    _encode = lazy_njit(_encode)
+
+
+def encode_bytes(symbols, huffman_codes):
+    """
+    Encodes a Latin-1 byte string with the JIT-compiled packing loop.
+
+    Args:
+        symbols (bytes): The text, encoded as Latin-1.
+        huffman_codes (dict): A dictionary mapping characters to their
+            (value, bit_length) codes, none longer than MAX_CODE_LENGTH.
+
+    Returns:
+        tuple: (bytes, int) - the packed bitstream (zero-padded to a whole
+        byte) and the number of meaningful bits in it.
+    """
+    code_value = np.zeros(256, dtype=np.uint64)
+    code_length = np.zeros(256, dtype=np.int64)
+    for char, (value, length) in huffman_codes.items():
+        if ord(char) < 256:
+            code_value[ord(char)] = value
+            code_length[ord(char)] = length
+
+    buf = np.frombuffer(symbols, dtype=np.uint8)
+    # The total length sizes the output up front; a zero marks a missing code
+    lengths = code_length[buf]
+    if not lengths.all():
+        char = chr(buf[lengths.argmin()])
+        raise ValueError(f"Character '{char}' not found in Huffman codes.")
+    n_bits = int(lengths.sum())
+    out = np.empty((n_bits + 7) // 8, dtype=np.uint8)
+    _encode(buf, code_value, code_length, out)
+    return out.tobytes(), n_bits
@@ -0,0 +1,43 @@
+import sys
+from functools import wraps
+from importlib.util import find_spec
+
+# Checked without importing Numba, which takes longer to load than the rest
+# of the program; it is only imported once a compiled function is called.
+JIT_AVAILABLE = find_spec("numba") is not None
+
+
+def jit_loaded():
+    """
+    Checks whether Numba has already been imported in this process, after
+    which compiled functions no longer pay its import time.
+
+    Returns:
+        bool: True once Numba is imported.
+    """
+    return sys.modules.get("numba") is not None
+
+
+def lazy_njit(func):
+    """
+    Wraps a function so that it is compiled with numba.njit(cache=True) on
+    its first call.
+
+    Args:
+        func (function): A function Numba can compile in nopython mode.
+
+    Returns:
+        function: A wrapper that calls the compiled function.
+    """
+    compiled = None
+
+    @wraps(func)
+    def wrapper(*args):
+        nonlocal compiled
+        if compiled is None:
+            from numba import njit
+
+            compiled = njit(cache=True)(func)
+        return compiled(*args)
+
+    return wrapper
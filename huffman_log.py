@@ -0,0 +1,18 @@
+from rich import print
+
+
+def resolve_log(log, verbose):
+    """
+    Picks the sink for a function's verbose messages.
+
+    Args:
+        log (callable, optional): An explicit message sink, called with each
+            message string.
+        verbose (bool): If True and no log is given, messages are printed.
+
+    Returns:
+        The log if given, rich's print if verbose, otherwise None.
+    """
+    if log is not None:
+        return log
+    return print if verbose else None
@@ -1,11 +1,19 @@
 import argparse
-import subprocess
-from collections import Counter
 from rich import print
 
-from huffman_encoder import build_huffman_tree, get_huffman_codes, huffman_encode
+from huffman_encoder import (
+    bits_to_str,
+    build_huffman_tree,
+    code_to_str,
+    code_table_bits,
+    count_frequencies,
+    get_huffman_codes,
+    huffman_encode,
+)
 from huffman_decoder import huffman_decode
-from visualization import visualize_huffman_tree
+
+# Longer encodings are truncated when printed.
+MAX_DISPLAY_BITS = 4096
 
 
 def main():
@@ -54,6 +62,8 @@ def main():
 
     # streamlit gui
     if args.gui:
+        import subprocess
+
         try:
             subprocess.run(["streamlit", "run", "gui.py"])
         except Exception as e:
@@ -66,19 +76,22 @@ def main():
         print("[yellow]Input text is empty. Exiting.[/yellow]")
         return
 
-    frequency = Counter(input_text)
+    frequency = count_frequencies(input_text)
 
     print(f'\n[bold magenta]Original Text:[/bold magenta] "{input_text}"')
     if args.verbose:
         print("[cyan]VERBOSE mode enabled.[/cyan]")
 
     # 1. Build Huffman Tree
-    huffman_tree_root = build_huffman_tree(input_text, frequency, args.verbose)
+    huffman_tree_root = build_huffman_tree(frequency, args.verbose)
 
     if huffman_tree_root:
         # Visualize the tree if requested
         if args.visualize:
             print("\nAttempting to visualize Huffman tree...")
+            # Imported here so runs without --visualize skip loading it
+            from visualization import visualize_huffman_tree
+
             try:
                 output_path = visualize_huffman_tree(
                     huffman_tree_root,
@@ -101,27 +114,32 @@ def main():
 
         print("\n[bold blue]--- Huffman Codes ---[/bold blue]")
         if huffman_codes:
-            for char, code in sorted(huffman_codes.items()):
+            # Canonical codes are already listed in character order
+            for char, code in huffman_codes.items():
                 char_display = char if char.isprintable() else f"ASCII({ord(char)})"
                 print(
-                    f"  Character: '{char_display}', Frequency: {frequency[char]}, Code: {code}"
+                    f"  Character: '{char_display}', Frequency: {frequency[char]}, Code: {code_to_str(code)}"
                 )
         else:
             print("  No Huffman codes generated (e.g. empty tree).")
         print("[bold blue]---------------------[/bold blue]")
 
         # 3. Encode the text
-        encoded_text = huffman_encode(input_text, huffman_codes, args.verbose)
+        encoded_data, encoded_length_bits = huffman_encode(
+            input_text, huffman_codes, args.verbose
+        )
+        # Only the printed prefix is rendered as a bitstring
+        shown_bits = min(encoded_length_bits, MAX_DISPLAY_BITS)
+        encoded_text = bits_to_str(encoded_data[: shown_bits // 8 + 1], shown_bits)
+        if encoded_length_bits > shown_bits:
+            encoded_text += f" … ({encoded_length_bits - shown_bits} more bits)"
         print(f"\n[bold magenta]Encoded Text:[/bold magenta] {encoded_text}")
 
         original_length_bits = len(input_text) * 8
-        encoded_length_bits = len(encoded_text)
 
-        # Calculate huffman table size (overhead)
-        huffman_table_bits = 0
-        for char, code in huffman_codes.items():
-            # For each character: store character (8 bits) + code itself
-            huffman_table_bits += 8 + len(code)
+        # Calculate huffman table size (overhead): canonical codes only need
+        # each character (8 bits) and its code length
+        huffman_table_bits = code_table_bits(huffman_codes)
 
         # Total size including the table
         total_compressed_bits = encoded_length_bits + huffman_table_bits
@@ -142,7 +160,10 @@ def main():
         print("[bold blue]-----------------------------[/bold blue]")
 
         # 4. Decode the text (for verification)
-        decoded_text = huffman_decode(encoded_text, huffman_tree_root, args.verbose)
+        # The packed bitstream is decoded directly; the string is only for display
+        decoded_text = huffman_decode(
+            (encoded_data, encoded_length_bits), huffman_codes, args.verbose
+        )
         print(f'\n[bold magenta]Decoded Text:[/bold magenta] "{decoded_text}"')
 
         if input_text == decoded_text:
@@ -1,8 +1,147 @@
 from pathlib import Path
+import hashlib
 import re
-import time
+from xml.sax.saxutils import escape
 from rich import print
 
+from huffman_encoder import code_to_str, get_huffman_codes, get_tree_signature
+
+# Characters replaced with "_" in filenames built from the input text.
+_INVALID_FN = re.compile(r'[\\/*?:"<>|\n\r]')
+# Trees up to this many leaves are drawn as SVG without Graphviz when no
+# viewer is opened.
+_INLINE_SVG_MAX_LEAVES = 128
+_SVG_MARGIN = 30
+_SVG_LEVEL_HEIGHT = 70
+_SVG_CHAR_WIDTH = 8
+
+
+def _tree_fingerprint(root_node):
+    """
+    Hashes the tree's leaf signature (see get_tree_signature), which fixes
+    its drawing.
+    (Internal helper function)
+    """
+    return hashlib.blake2b(
+        repr(get_tree_signature(root_node)).encode("utf-8", "surrogatepass"),
+        digest_size=8,
+    ).hexdigest()
+
+
+def _node_label(node, huffman_codes):
+    """
+    Returns the label drawn for a node: the character, its frequency and its
+    code for leaves, the frequency alone for internal nodes. Canonical codes
+    need not follow the tree's branches, so each leaf shows its own code and
+    the edges are left unlabelled.
+    (Internal helper function)
+    """
+    if node.char is None:
+        return f"freq={node.freq}"
+    char_repr = node.char if node.char.isprintable() else f"ASCII({ord(node.char)})"
+    return f"'{char_repr}': {node.freq}, code {code_to_str(huffman_codes[node.char])}"
+
+
+def _tree_dot_source(root_node, huffman_codes):
+    """
+    Writes the DOT source for the tree in one pre-order pass with an explicit
+    stack, numbering nodes in visiting order.
+    (Internal helper function)
+    """
+    lines = ["// Huffman Tree", "digraph {", "\trankdir=TB"]
+    node_id = 0
+    stack = [(root_node, None)]
+    while stack:
+        node, parent_id = stack.pop()
+        # Backslashes and quotes are escaped for the DOT string
+        label = (
+            _node_label(node, huffman_codes).replace("\\", "\\\\").replace('"', '\\"')
+        )
+        shape = "box" if node.char is not None else "ellipse"
+        lines.append(f'\t{node_id} [label="{label}" shape={shape}]')
+
+        if parent_id is not None:
+            lines.append(f"\t{parent_id} -> {node_id}")
+
+        if node.right is not None:
+            stack.append((node.right, node_id))
+        if node.left is not None:
+            stack.append((node.left, node_id))
+        node_id += 1
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def _tree_svg(root_node, huffman_codes):
+    """
+    Draws the tree as an SVG document without Graphviz. Leaves are spaced
+    evenly from left to right, each internal node is centred over its two
+    children, and every level sits one row below its parent. Returns None
+    for trees with more than _INLINE_SVG_MAX_LEAVES leaves.
+    (Internal helper function)
+    """
+    # Post-order pass: leaf slots first, then internal nodes between them
+    slots = {}
+    depths = {}
+    n_leaves = 0
+    stack = [(root_node, 0, False)]
+    while stack:
+        node, depth, children_placed = stack.pop()
+        depths[node] = depth
+        if node.char is not None:
+            if n_leaves == _INLINE_SVG_MAX_LEAVES:
+                return None
+            slots[node] = n_leaves
+            n_leaves += 1
+        elif children_placed:
+            slots[node] = (slots[node.left] + slots[node.right]) / 2
+        else:
+            stack.append((node, depth, True))
+            stack.append((node.right, depth + 1, False))
+            stack.append((node.left, depth + 1, False))
+
+    labels = {node: _node_label(node, huffman_codes) for node in slots}
+    slot_width = max(len(label) for label in labels.values()) * _SVG_CHAR_WIDTH + 20
+    width = n_leaves * slot_width + 2 * _SVG_MARGIN
+    height = max(depths.values()) * _SVG_LEVEL_HEIGHT + 2 * _SVG_MARGIN
+
+    def center(node):
+        x = _SVG_MARGIN + (slots[node] + 0.5) * slot_width
+        return x, _SVG_MARGIN + depths[node] * _SVG_LEVEL_HEIGHT
+
+    edges = []
+    shapes = []
+    for node, label in labels.items():
+        x, y = center(node)
+        half_width = len(label) * _SVG_CHAR_WIDTH / 2 + 8
+        if node.char is not None:
+            shapes.append(
+                f'<rect x="{x - half_width:.1f}" y="{y - 13}" width="{2 * half_width:.1f}" '
+                f'height="26" fill="white" stroke="black"/>'
+            )
+        else:
+            shapes.append(
+                f'<ellipse cx="{x:.1f}" cy="{y}" rx="{half_width:.1f}" ry="15" '
+                f'fill="white" stroke="black"/>'
+            )
+            for child in (node.left, node.right):
+                child_x, child_y = center(child)
+                edges.append(
+                    f'<line x1="{x:.1f}" y1="{y}" x2="{child_x:.1f}" y2="{child_y}" '
+                    f'stroke="black"/>'
+                )
+        shapes.append(
+            f'<text x="{x:.1f}" y="{y + 4}" text-anchor="middle">{escape(label)}</text>'
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" '
+        f'height="{height}" viewBox="0 0 {width:.0f} {height}" '
+        f'font-family="monospace" font-size="12">\n'
+        + "\n".join(edges + shapes)
+        + "\n</svg>\n"
+    )
+
 
 def visualize_huffman_tree(
     root_node, view=True, output_file=None, format="png", input_text=None
@@ -10,6 +149,14 @@ def visualize_huffman_tree(
     """
     Visualizes the Huffman tree using Graphviz.
 
+    The tree is drawn as build_huffman_tree merged it, with each leaf
+    labelled by its canonical code from get_huffman_codes.
+
+    Without an output_file, an earlier render of the same tree in the same
+    format is reused instead of running Graphviz again. SVGs of trees with
+    up to 128 leaves that are not opened in a viewer are drawn in Python,
+    so Graphviz is not needed for them.
+
     Args:
         root_node (Node): The root node of the Huffman tree.
         view (bool): If True, opens the generated graph image.
@@ -19,10 +166,10 @@ def visualize_huffman_tree(
         input_text (str, optional): Original input text to use for the filename.
 
     Returns:
-        path_to_file (tuple): the path to the visualization file, or None on error
+        path_to_file (str): the path to the visualization file, or None on error
     """
     try:
-        from graphviz import Digraph
+        from graphviz import Source, view as open_rendered
     except ImportError:
         print(
             "[bold red]Error:[/bold red] The [cyan]graphviz[/cyan] package is required for tree visualization."
@@ -35,6 +182,7 @@ def visualize_huffman_tree(
 
     if root_node is None:
         return None
+    huffman_codes = get_huffman_codes(root_node)
 
     # Check if output_file is provided
     if output_file is None:
@@ -42,51 +190,36 @@ def visualize_huffman_tree(
         vis_dir.mkdir(parents=True, exist_ok=True)
 
         if input_text:
-            clean_text = re.sub(r'[\\/*?:"<>|\n\r]', "_", input_text)
-            if len(clean_text) > 30:
-                clean_text = clean_text[:27] + "..."
+            # Only the prefix kept in the filename is sanitized
+            if len(input_text) > 30:
+                clean_text = _INVALID_FN.sub("_", input_text[:27]) + "..."
+            else:
+                clean_text = _INVALID_FN.sub("_", input_text)
         else:
             clean_text = "huffman_tree"
 
-        # Add timestamp to ensure unique filenames regardless of case sensitivity
-        timestamp = int(time.time() * 1000)
-        filename_base = f"{clean_text}_{timestamp}"
-        output_file_path = vis_dir / filename_base
+        # The hash names the tree, not the text, so any input producing the
+        # same tree (e.g. an anagram) reuses the render, whatever its prefix
+        key = _tree_fingerprint(root_node)
+        rendered_path = next(vis_dir.glob(f"*_{key}.{format}"), None)
+        if rendered_path is not None:
+            if view:
+                open_rendered(rendered_path)
+            return str(rendered_path)
+        output_file_path = vis_dir / f"{clean_text}_{key}"
     else:
         output_file_path = Path(output_file)
 
-    dot = Digraph(comment="Huffman Tree", format=format)
-    dot.attr(rankdir="TB")
-
-    node_counter = [0]
-
-    def add_nodes_edges(node, parent_id=None):
-        if node is None:
-            return
-
-        current_id = str(node_counter[0])
-        node_counter[0] += 1
-
-        if node.char is not None:
-            char_repr = (
-                node.char if node.char.isprintable() else f"ASCII({ord(node.char)})"
-            )
-            label = f"'{char_repr}': {node.freq}"
-            shape = "box"
-        else:
-            label = f"freq={node.freq}"
-            shape = "ellipse"
-
-        dot.node(current_id, label, shape=shape)
-
-        if parent_id is not None:
-            edge_label = "0" if parent_id[1] == "L" else "1"
-            dot.edge(parent_id[0], current_id, label=edge_label)
-
-        add_nodes_edges(node.left, (current_id, "L"))
-        add_nodes_edges(node.right, (current_id, "R"))
+    # Drawing small trees directly skips the dot subprocess entirely
+    if format == "svg" and not view:
+        svg = _tree_svg(root_node, huffman_codes)
+        if svg is not None:
+            rendered_path = output_file_path.with_name(f"{output_file_path.name}.svg")
+            rendered_path.parent.mkdir(parents=True, exist_ok=True)
+            rendered_path.write_text(svg, encoding="utf-8")
+            return str(rendered_path)
 
-    add_nodes_edges(root_node)
+    dot = Source(_tree_dot_source(root_node, huffman_codes), format=format)
 
     try:
         rendered_path = dot.render(